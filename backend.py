@@ -4,6 +4,7 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 import requests
 import os
@@ -12,13 +13,14 @@ import asyncio
 import sqlite3
 import numpy as np
 import json
-from typing import List
+from typing import Callable, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # --- Configuration ---
-API_BASE_URL = "http://localhost:5000"
+API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:5000")
+AGENT_MODEL = "gemini-2.5-flash-lite"
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
 
 if not GOOGLE_API_KEY:
@@ -32,8 +34,10 @@ client = Client(api_key=GOOGLE_API_KEY)
 
 
 class KnowledgeBaseService:
-    def __init__(self, db_path="rag_knowledge.db"):
+    def __init__(self, db_path="rag_knowledge.db", embed_fn: Optional[Callable[[str], List[float]]] = None):
         self.db_path = db_path
+        # Defaults to Google GenAI embeddings; pass a local function to run offline
+        self.embed_fn = embed_fn
         self.init_db()
         # Only populate if empty to avoid duplicates on restart
         if self.is_db_empty():
@@ -58,7 +62,9 @@ class KnowledgeBaseService:
         return count == 0
 
     def get_embedding(self, text: str) -> List[float]:
-        """Generates embedding using Google GenAI."""
+        """Generates embedding using Google GenAI (or the injected `embed_fn`)."""
+        if self.embed_fn is not None:
+            return self.embed_fn(text)
         try:
             # Using the standard gecko text embedding model
             result = client.models.embed_content(
@@ -141,8 +147,9 @@ class KnowledgeBaseService:
             self.add_document(text)
 
 
-# Initialize the RAG Service
-rag_service = KnowledgeBaseService()
+# The RAG Service is initialized on app startup (see `lifespan`) unless one
+# was already provided, e.g. by the offline benchmark harness.
+rag_service: Optional[KnowledgeBaseService] = None
 
 # --- Existing Mock Tools ---
 
@@ -221,6 +228,18 @@ def report_dispute_tool(txn_id: str, reason: str) -> dict:
         return {"error": str(e)}
 
 
+def get_spend_summary_tool(customer_id: str, month: str = "", category: str = "") -> dict:
+    """Gets total spend and transaction counts per month and category.
+
+    month is YYYY-MM (e.g. 2025-11) and category e.g. Travel, Food; leave either empty for all.
+    """
+    params = {k: v for k, v in {"month": month, "category": category}.items() if v}
+    try:
+        return requests.get(f"{API_BASE_URL}/analytics/spend/{customer_id}", params=params).json()
+    except Exception as e:
+        return {"error": str(e)}
+
+
 def check_risk_status_tool(customer_id: str) -> dict:
     """Checks if the user is in the collections/high-risk bucket."""
     try:
@@ -262,26 +281,41 @@ You are the **OneCard AI Assistant**. You help users manage their credit cards.
 ### TOOL USAGE RULES:
 - `ask_knowledge_base_tool`: Use for "How long does delivery take?", "Can I prepay EMI?", "How to dispute?".
 - `open_account_tool`: Only for actually initiating a new application.
+- `get_spend_summary_tool`: Use for "How much did I spend on travel this month?" instead of paging through transactions.
 """
 
 # --- Agent & Runner Setup ---
 
-agent = Agent(
-    name="OneCardGenAI",
-    model="gemini-2.5-flash-lite",
-    instruction=system_prompt,
-    tools=[
-        # Informational Tool
-        ask_knowledge_base_tool,
-        # Action Tools
-        open_account_tool, get_account_details_tool, track_card_tool,
-        block_freeze_card_tool, get_bill_tool, make_payment_tool,
-        get_transactions_tool, convert_emi_tool, report_dispute_tool,
-        check_risk_status_tool
-    ]
-)
+def build_agent(model=AGENT_MODEL) -> Agent:
+    """Builds the assistant agent; `model` is a model name or an ADK `BaseLlm`."""
+    return Agent(
+        name="OneCardGenAI",
+        model=model,
+        instruction=system_prompt,
+        tools=[
+            # Informational Tool
+            ask_knowledge_base_tool,
+            # Action Tools
+            open_account_tool, get_account_details_tool, track_card_tool,
+            block_freeze_card_tool, get_bill_tool, make_payment_tool,
+            get_transactions_tool, convert_emi_tool, report_dispute_tool,
+            check_risk_status_tool, get_spend_summary_tool
+        ]
+    )
+
+
+agent = build_agent()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global rag_service
+    if rag_service is None:
+        rag_service = KnowledgeBaseService()
+    yield
+
 
-app = FastAPI(debug=True)
+app = FastAPI(debug=True, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
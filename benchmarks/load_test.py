@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test for PrismPay.
+
+Seeds a throwaway core-banking DB, starts mock_apis.py and an offline
+backend.py (StubLlm + local embedder, see offline_backend.py), then drives
+/chat, every mock-API route and KnowledgeBaseService.search at a fixed
+concurrency. Reports p50/p95/p99 latency and requests/sec, and saves the
+results as JSON so runs can be compared between commits.
+
+Usage:
+    python3 benchmarks/load_test.py --customers 1000 --requests 300 --concurrency 8
+    python3 benchmarks/load_test.py --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import start  # noqa: E402
+from start import Colors, print_colored  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+CHAT_QUERIES = [
+    "What is my bill? My id is {customer_id}",
+    "Show my recent transactions for {customer_id}",
+    "What is my available limit? {customer_id}",
+    "Am I at risk of going overdue? {customer_id}",
+    "How much did I spend per category? {customer_id}",
+    "How long does card delivery take?",
+    "Hi there!",
+]
+
+
+def mock_routes(customer_ids, txn_ids):
+    """(label, method, path, json body) builders for every mock-API route."""
+    def cid(i):
+        return customer_ids[(i * 7919) % len(customer_ids)]
+
+    def tid(i):
+        return txn_ids[(i * 7919) % len(txn_ids)]
+
+    return [
+        ("POST /account/open", lambda i: ("POST", "/account/open",
+                                          {"name": "Bench User", "phone": f"+91 8{i:09d}"})),
+        ("GET /account/details", lambda i: ("GET", f"/account/details/{cid(i)}", None)),
+        ("GET /card/track", lambda i: ("GET", f"/card/track/{cid(i)}", None)),
+        ("POST /card/control", lambda i: ("POST", f"/card/control/{cid(i)}", {"action": "freeze"})),
+        ("GET /bill/summary", lambda i: ("GET", f"/bill/summary/{cid(i)}", None)),
+        ("POST /payment/pay", lambda i: ("POST", f"/payment/pay/{cid(i)}",
+                                         {"amount": 1.0, "method": "UPI"})),
+        ("GET /transactions/list?limit=5", lambda i: ("GET", f"/transactions/list/{cid(i)}", None)),
+        ("GET /transactions/list?limit=100",
+         lambda i: ("GET", f"/transactions/list/{cid(i)}?limit=100", None)),
+        ("GET /transactions/export/ndjson",
+         lambda i: ("GET", f"/transactions/export/ndjson?customer_id={cid(i)}", None)),
+        ("POST /transactions/convert_emi", lambda i: ("POST", "/transactions/convert_emi",
+                                                      {"txn_id": tid(i), "tenure_months": 6})),
+        ("POST /transactions/dispute", lambda i: ("POST", "/transactions/dispute",
+                                                  {"txn_id": tid(i), "reason": "benchmark"})),
+        ("GET /collections/check", lambda i: ("GET", f"/collections/check/{cid(i)}", None)),
+        ("GET /collections/bucket", lambda i: ("GET", "/collections/bucket/CRITICAL?limit=100", None)),
+        ("GET /analytics/spend", lambda i: ("GET", f"/analytics/spend/{cid(i)}", None)),
+    ]
+
+
+def summarize(latencies, errors, wall):
+    """Latency percentiles (ms) and throughput for one workload."""
+    lat = np.array(latencies) * 1000
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / wall, 2) if wall else 0.0,
+        "mean_ms": round(float(lat.mean()), 3) if len(lat) else None,
+        "p50_ms": round(float(np.percentile(lat, 50)), 3) if len(lat) else None,
+        "p95_ms": round(float(np.percentile(lat, 95)), 3) if len(lat) else None,
+        "p99_ms": round(float(np.percentile(lat, 99)), 3) if len(lat) else None,
+    }
+
+
+def run_load(call, n_requests, concurrency):
+    """Runs call(i, session) for i in range(n_requests) on `concurrency` threads."""
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def one(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        t0 = time.perf_counter()
+        try:
+            ok = call(i, local.session)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - t0
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n_requests)))
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def http_call(base_url, build):
+    def call(i, session):
+        method, path, body = build(i)
+        resp = session.request(method, base_url + path, json=body, timeout=60)
+        resp.content  # Drain streaming bodies so they count toward latency
+        # A 4xx means the workload is not exercising the route, so it is an error too
+        return 200 <= resp.status_code < 300
+    return call
+
+
+def bench_kb_search(kb_path, kb_docs, n_requests):
+    """Times KnowledgeBaseService.search in-process (sequential, stub embedder)."""
+    from benchmarks.offline_backend import build_knowledge_base
+
+    kb = build_knowledge_base(kb_path, kb_docs)
+    queries = ["How long does card delivery take?", "What are EMI interest rates?",
+               "How do I dispute a transaction?", "When is my bill generated?"]
+    latencies = []
+    started = time.perf_counter()
+    for i in range(n_requests):
+        t0 = time.perf_counter()
+        kb.search(queries[i % len(queries)])
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, 0, time.perf_counter() - started)
+
+
+def seed(args, db_url):
+    print_colored(f"🌱 Seeding {args.customers} customers (seed={args.seed})...", Colors.GREEN)
+    subprocess.run([sys.executable, "seed_load_data.py", "--customers", str(args.customers),
+                    "--txns-per-customer", str(args.txns_per_customer), "--seed", str(args.seed),
+                    "--database-url", db_url], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    for script in ("risk_scoring.py", "spend_analytics.py"):
+        subprocess.run([sys.executable, script], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+
+def sample_ids(db_path, limit=500):
+    conn = sqlite3.connect(db_path)
+    try:
+        customers = [r[0] for r in conn.execute(
+            "SELECT id FROM customers ORDER BY id LIMIT ?", (limit,))]
+        txns = [r[0] for r in conn.execute(
+            "SELECT id FROM transactions WHERE amount >= 2500 AND NOT is_emi ORDER BY id LIMIT ?",
+            (limit,))]
+    finally:
+        conn.close()
+    return customers, txns
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results, baseline=None):
+    header = f"{'workload':<34} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5}"
+    if baseline:
+        header += f" {'Δp50':>8} {'Δrps':>8}"
+    print_colored("\n" + header, Colors.YELLOW)
+    for name, r in results.items():
+        line = (f"{name:<34} {r['rps']:>9.1f} {r['p50_ms'] or 0:>9.2f} "
+                f"{r['p95_ms'] or 0:>9.2f} {r['p99_ms'] or 0:>9.2f} {r['errors']:>5}")
+        base = (baseline or {}).get(name)
+        if base and base.get("p50_ms") and r["p50_ms"]:
+            line += (f" {(r['p50_ms'] / base['p50_ms'] - 1) * 100:>+7.1f}%"
+                     f" {(r['rps'] / base['rps'] - 1) * 100:>+7.1f}%")
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test.")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--txns-per-customer", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="Requests per workload (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--kb-docs", type=int, default=0,
+                        help="Synthetic KB documents on top of the mock data (default: 0)")
+    parser.add_argument("--only", default="chat,mock,kb",
+                        help="Comma-separated workloads to run: chat, mock, kb")
+    parser.add_argument("--mock-port", type=int, default=5100)
+    parser.add_argument("--backend-port", type=int, default=8100)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workloads = set(args.only.split(","))
+    workdir = tempfile.mkdtemp(prefix="prismpay-bench-")
+    db_path = os.path.join(workdir, "onecard.db")
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    backend_url = f"http://127.0.0.1:{args.backend_port}"
+
+    # Inherited by every child: the seeder, risk scoring, mock API and backend
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["API_BASE_URL"] = mock_url
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    # Service logs go to logs/ under the repo root, like start.py
+    os.chdir(ROOT)
+    os.makedirs("logs", exist_ok=True)
+
+    seed(args, os.environ["DATABASE_URL"])
+    # Each EMI conversion needs its own unconverted transaction
+    customer_ids, txn_ids = sample_ids(db_path, max(500, args.requests))
+
+    services = []
+    if workloads & {"chat", "mock"}:
+        services.append(start.Service(
+            "Bench Mock API", f"{sys.executable} -m uvicorn mock_apis:app --port {args.mock_port} "
+            "--log-level warning", health_url=f"{mock_url}/openapi.json", url=mock_url, cwd=ROOT))
+    if "chat" in workloads:
+        services.append(start.Service(
+            "Bench Backend", f"{sys.executable} benchmarks/offline_backend.py --port {args.backend_port} "
+            f"--kb-path {os.path.join(workdir, 'kb.db')} --kb-docs {args.kb_docs}",
+            health_url=f"{backend_url}/openapi.json", url=backend_url, cwd=ROOT, ready_timeout=120))
+
+    results = {}
+    try:
+        start.start_all(services)
+        failed = [s.name for s in services if not s.ready.is_set()]
+        if failed:
+            print_colored(f"❌ Not ready: {', '.join(failed)} (see logs/)", Colors.RED)
+            sys.exit(1)
+
+        if "mock" in workloads:
+            for label, build in mock_routes(customer_ids, txn_ids):
+                print_colored(f"⏱  {label}", Colors.BLUE)
+                results[label] = run_load(http_call(mock_url, build), args.requests, args.concurrency)
+
+        if "chat" in workloads:
+            def build_chat(i):
+                query = CHAT_QUERIES[i % len(CHAT_QUERIES)].format(
+                    customer_id=customer_ids[i % len(customer_ids)])
+                # Fresh user per request so session history does not grow across the run
+                return "POST", "/chat", {"user_id": f"bench-{i}", "query": query}
+            print_colored("⏱  POST /chat", Colors.BLUE)
+            results["POST /chat"] = run_load(http_call(backend_url, build_chat),
+                                             args.requests, args.concurrency)
+
+        if "kb" in workloads:
+            print_colored("⏱  KnowledgeBaseService.search", Colors.BLUE)
+            results["KnowledgeBaseService.search"] = bench_kb_search(
+                os.path.join(workdir, "kb_search.db"), args.kb_docs, args.requests)
+    finally:
+        for s in services:
+            if s.process is not None and s.process.poll() is None:
+                start.signal_service(s.process, signal.SIGTERM)
+                s.process.wait(timeout=10)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+    print_colored(f"\n📝 Results saved to {output}", Colors.YELLOW)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Runs backend.py fully offline: the agent uses StubLlm and the knowledge base
+uses the local hashing embedder, so no Google API calls are made.
+
+Usage: python3 benchmarks/offline_backend.py --port 8100 --kb-path /tmp/kb.db
+(set API_BASE_URL to point the agent's tools at a running mock_apis.py)
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# backend.py refuses to start without a key; it is never used offline
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import uvicorn  # noqa: E402
+
+import backend  # noqa: E402
+from benchmarks.stubs import StubLlm, stub_embed  # noqa: E402
+
+
+def build_knowledge_base(kb_path, extra_docs=0):
+    """Creates a fresh KB embedded with `stub_embed`, padded with synthetic docs."""
+    if os.path.exists(kb_path):
+        os.remove(kb_path)
+    kb = backend.KnowledgeBaseService(db_path=kb_path, embed_fn=stub_embed)
+    for i in range(extra_docs):
+        kb.add_document(f"Synthetic policy note {i}: card feature {i % 97}, "
+                        f"fee schedule {i % 13}, reward tier {i % 7}.")
+    return kb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run backend.py with offline stand-ins.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--kb-path", required=True,
+                        help="SQLite file for the stub-embedded knowledge base")
+    parser.add_argument("--kb-docs", type=int, default=0,
+                        help="Synthetic documents added on top of the mock data (default: 0)")
+    args = parser.parse_args()
+
+    backend.rag_service = build_knowledge_base(args.kb_path, args.kb_docs)
+    backend.agent = backend.build_agent(StubLlm())
+    uvicorn.run(backend.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
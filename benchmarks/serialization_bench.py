@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request serialization cost of /transactions/list.
+
+Compares the old path (raw ORM objects through jsonable_encoder + json.dumps)
+against what FastAPI does with response_model=TransactionListResponse: validate
+through the field's TypeAdapter, then dump_json straight to bytes. For
+reference, it also times the dump_python + JSONResponse path FastAPI falls
+back to whenever a custom response class is set.
+
+Usage: python3 benchmarks/serialization_bench.py [--repeat 200]
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing mock_apis runs create_all; keep it away from the real ./onecard.db
+_scratch = tempfile.mkdtemp(prefix="serialization_bench_")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'bench.db')}"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from mock_apis import TransactionListResponse  # noqa: E402
+from setup_database import Transaction  # noqa: E402
+
+LIMITS = [5, 100, 1000]
+
+
+def make_transactions(n):
+    """Builds detached ORM rows shaped like the seeded data."""
+    now = datetime(2025, 11, 30, 12, 0, 0)
+    return [
+        Transaction(
+            id=f"txn_{i:08x}",
+            customer_id="cust_bench001",
+            merchant=f"Merchant {i}",
+            amount=round(100 + (i * 37.5) % 9900, 2),
+            category=["Food", "Travel", "Utilities", "Shopping", "Entertainment"][i % 5],
+            date=now - timedelta(minutes=i),
+            is_emi=False,
+            dispute_status="none",
+        )
+        for i in range(n)
+    ]
+
+
+def legacy(txns):
+    return json.dumps(jsonable_encoder({"count": len(txns), "transactions": txns})).encode()
+
+
+# The same adapter FastAPI builds for the route's response field
+ADAPTER = TypeAdapter(TransactionListResponse)
+
+
+def fastapi_dump_json(txns):
+    value = ADAPTER.validate_python({"count": len(txns), "transactions": txns}, from_attributes=True)
+    return ADAPTER.dump_json(value)
+
+
+def custom_response_class(txns):
+    value = ADAPTER.validate_python({"count": len(txns), "transactions": txns}, from_attributes=True)
+    return JSONResponse(ADAPTER.dump_python(value, mode="json")).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="Iterations per measurement (default: 200)")
+    args = parser.parse_args()
+
+    strategies = [("jsonable_encoder", legacy),
+                  ("dump_json (FastAPI)", fastapi_dump_json),
+                  ("dump_python+JSON", custom_response_class)]
+
+    print(f"{'limit':>6}  " + "  ".join(f"{name:>19}" for name, _ in strategies))
+    for limit in LIMITS:
+        txns = make_transactions(limit)
+        # Sanity check: every strategy must produce the same document
+        expected = json.loads(legacy(txns))
+        for name, fn in strategies:
+            assert json.loads(fn(txns)) == expected, name
+
+        cells = []
+        for name, fn in strategies:
+            best = min(timeit.repeat(lambda: fn(txns), number=args.repeat, repeat=5))
+            cells.append(f"{best / args.repeat * 1e6:>16.1f} us")
+        print(f"{limit:>6}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
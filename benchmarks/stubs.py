@@ -0,0 +1,95 @@
+"""
+Deterministic local stand-ins for the Gemini model and the embedding API,
+used by the offline benchmark suite (see load_test.py).
+"""
+
+import hashlib
+import json
+import re
+from typing import AsyncGenerator, List
+
+import numpy as np
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+EMBEDDING_DIM = 256
+
+CUSTOMER_ID_RE = re.compile(r"\bcust_\w+")
+TXN_ID_RE = re.compile(r"\btxn_\w+")
+
+# (pattern on the user's message, tool to call, args builder); first match wins.
+# Messages that match nothing get a plain text reply without tool calls.
+SCRIPT = [
+    (re.compile(r"\bbill\b", re.I), "get_bill_tool",
+     lambda text: {"customer_id": _first(CUSTOMER_ID_RE, text)}),
+    (re.compile(r"\btransactions?\b", re.I), "get_transactions_tool",
+     lambda text: {"customer_id": _first(CUSTOMER_ID_RE, text)}),
+    (re.compile(r"\b(balance|limit|rewards?)\b", re.I), "get_account_details_tool",
+     lambda text: {"customer_id": _first(CUSTOMER_ID_RE, text)}),
+    (re.compile(r"\b(risk|overdue)\b", re.I), "check_risk_status_tool",
+     lambda text: {"customer_id": _first(CUSTOMER_ID_RE, text)}),
+    (re.compile(r"\btrack\b", re.I), "track_card_tool",
+     lambda text: {"customer_id": _first(CUSTOMER_ID_RE, text)}),
+    (re.compile(r"\bdispute\b", re.I), "report_dispute_tool",
+     lambda text: {"txn_id": _first(TXN_ID_RE, text), "reason": "benchmark"}),
+    (re.compile(r"\bspen[dt]\b", re.I), "get_spend_summary_tool",
+     lambda text: {"customer_id": _first(CUSTOMER_ID_RE, text)}),
+    (re.compile(r"^(how|what|can|where|when)\b", re.I), "ask_knowledge_base_tool",
+     lambda text: {"query": text}),
+]
+
+
+def _first(pattern, text):
+    match = pattern.search(text)
+    return match.group(0) if match else ""
+
+
+def stub_embed(text: str) -> List[float]:
+    """Hashing-trick bag-of-words embedding: deterministic, unit length, no network."""
+    vec = np.zeros(EMBEDDING_DIM)
+    for token in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+        vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    if norm:
+        vec /= norm
+    else:
+        vec[0] = 1.0
+    return vec.tolist()
+
+
+class StubLlm(BaseLlm):
+    """Scripted model: one tool call chosen by keyword, then a text summary of its result."""
+
+    model: str = "offline-stub"
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = (last.parts or []) if last else []
+
+        # Second turn: the tool has answered, so wrap its result up as text
+        responses = [p.function_response for p in parts if p.function_response]
+        if responses:
+            summary = "; ".join(
+                f"{r.name}: {json.dumps(r.response, default=str)[:200]}" for r in responses)
+            yield self._text(f"Here is what I found. {summary}")
+            return
+
+        text = " ".join(p.text for p in parts if p.text)
+        for pattern, tool, build_args in SCRIPT:
+            if pattern.search(text):
+                call = types.FunctionCall(name=tool, args=build_args(text))
+                yield LlmResponse(content=types.Content(
+                    role="model", parts=[types.Part(function_call=call)]))
+                return
+
+        yield self._text("Hello! I'm the OneCard assistant. How can I help you today?")
+
+    @staticmethod
+    def _text(text):
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+OneCard Bot - Billing Cycle Engine
+Generates each customer's statement for a monthly cycle from their
+transactions, payments and EMI plans, writes it to `statements`, and
+updates `balance_due` / `min_due` / `due_date` on the customer.
+
+Customers are processed in id order, in chunks. Each chunk (statements,
+customer updates and the `billing_runs` checkpoint) commits as one DB
+transaction, so an interrupted run resumes where it stopped:
+
+    python3 billing.py --cycle 2025-11
+
+Cycles are billed in order: a cycle older than the latest billed one is
+rejected, so --force can only rerun the latest cycle.
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, bindparam, case, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from setup_database import (Base, BillingRun, Customer, EmiPlan, SessionLocal, Statement,
+                            Transaction, engine)
+from risk_scoring import score_all_customers
+from spend_analytics import PAYMENT_CATEGORY
+
+# Interest on the balance carried over from the previous statement (~42% p.a.)
+MONTHLY_INTEREST_RATE = 0.035
+# Charged when less than the previous minimum due was paid by its due date
+LATE_FEE = 500.0
+MIN_DUE_RATE = 0.05
+MIN_DUE_FLOOR = 200.0
+# Statement is generated on the 1st; payment is due this many days after the cycle ends
+DUE_DAYS = 18
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def add_months(cycle: str, months: int) -> str:
+    """'2025-11' + 3 -> '2026-02'."""
+    year, month = map(int, cycle.split("-"))
+    index = year * 12 + (month - 1) + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def cycle_of(day) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def cycle_bounds(cycle: str):
+    """First and last day of the cycle."""
+    year, month = map(int, cycle.split("-"))
+    next_year, next_month = map(int, add_months(cycle, 1).split("-"))
+    return date(year, month, 1), date(next_year, next_month, 1) - timedelta(days=1)
+
+
+def statement_period_label(start, end) -> str:
+    """e.g. 'Nov 1 - Nov 30'."""
+    return f"{start:%b} {start.day} - {end:%b} {end.day}"
+
+
+def compute_statement(opening, emi_credits, purchases, emi_installments, payments, payments_by_due,
+                      prev_min_due):
+    """Statement amounts for one customer; all inputs are cycle totals."""
+    opening = opening - emi_credits
+    carried = max(opening - payments, 0.0)
+    interest = round(carried * MONTHLY_INTEREST_RATE, 2)
+    late_fee = LATE_FEE if prev_min_due > 0 and payments_by_due < prev_min_due else 0.0
+    total = round(max(opening + purchases + emi_installments + interest + late_fee - payments, 0.0), 2)
+    min_due = round(min(total, max(total * MIN_DUE_RATE, MIN_DUE_FLOOR)), 2)
+    return {
+        "interest": interest,
+        "late_fee": late_fee,
+        "total_outstanding": total,
+        "min_due": min_due,
+    }
+
+
+def build_statements(db: Session, cycle: str, customer_ids):
+    """Statements for a chunk of customers, from three grouped queries over the chunk's id range."""
+    first, last = customer_ids[0], customer_ids[-1]
+    start, end = cycle_bounds(cycle)
+    period_start = datetime.combine(start, datetime.min.time())
+    period_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    # Every statement of a cycle shares one due date, so the previous one is a constant
+    prev_due_end = datetime.combine(start - timedelta(days=1) + timedelta(days=DUE_DAYS + 1),
+                                    datetime.min.time())
+
+    is_payment = func.coalesce(Transaction.category, "") == PAYMENT_CATEGORY
+    # Purchases moved to an EMI plan are billed through its installments instead, unless
+    # they were converted after being billed; those are credited back (`credit_cycle`)
+    is_purchase = and_(~is_payment, or_(EmiPlan.txn_id.is_(None), EmiPlan.credit_cycle.is_not(None)))
+    in_cycle = Transaction.date < period_end
+    activity = {
+        row.customer_id: row for row in db.execute(
+            select(
+                Transaction.customer_id,
+                func.sum(case((and_(in_cycle, is_purchase), Transaction.amount),
+                              else_=0.0)).label("purchases"),
+                func.sum(case((and_(in_cycle, is_payment), Transaction.amount),
+                              else_=0.0)).label("payments"),
+                func.sum(case((and_(is_payment, Transaction.date < prev_due_end), Transaction.amount),
+                              else_=0.0)).label("payments_by_due"),
+                # Posted after the cycle closed: not on this statement, but part of the live balance
+                func.sum(case((and_(~in_cycle, is_purchase), Transaction.amount),
+                              else_=0.0)).label("later_purchases"),
+                func.sum(case((and_(~in_cycle, is_payment), Transaction.amount),
+                              else_=0.0)).label("later_payments"),
+            )
+            .outerjoin(EmiPlan, EmiPlan.txn_id == Transaction.id)
+            .where(Transaction.customer_id.between(first, last), Transaction.date >= period_start)
+            .group_by(Transaction.customer_id)
+        )
+    }
+    installments = dict(db.execute(
+        select(EmiPlan.customer_id, func.sum(EmiPlan.monthly_installment))
+        .where(EmiPlan.customer_id.between(first, last),
+               EmiPlan.first_cycle <= cycle, EmiPlan.last_cycle >= cycle)
+        .group_by(EmiPlan.customer_id)
+    ).all())
+    credits = dict(db.execute(
+        select(EmiPlan.customer_id, func.sum(EmiPlan.principal))
+        .where(EmiPlan.customer_id.between(first, last), EmiPlan.credit_cycle == cycle)
+        .group_by(EmiPlan.customer_id)
+    ).all())
+    previous = {
+        row.customer_id: row for row in db.execute(
+            select(Statement.customer_id, Statement.total_outstanding, Statement.min_due)
+            .where(Statement.customer_id.between(first, last),
+                   Statement.cycle == add_months(cycle, -1))
+        )
+    }
+    # Without a previous statement the opening balance comes from the customer record:
+    # a rerun keeps the opening it had, a first run backs out payments made since the
+    # cycle started (the API deducts them from balance_due as they happen).
+    rerun_openings = dict(db.execute(
+        select(Statement.customer_id, Statement.opening_balance)
+        .where(Statement.customer_id.between(first, last), Statement.cycle == cycle)
+    ).all())
+    balances = dict(db.execute(
+        select(Customer.id, Customer.balance_due).where(Customer.id.between(first, last))
+    ).all())
+
+    now = datetime.utcnow()
+    due_date = end + timedelta(days=DUE_DAYS)
+    statements = []
+    for customer_id in customer_ids:
+        act = activity.get(customer_id)
+        prev = previous.get(customer_id)
+        if prev:
+            opening = prev.total_outstanding
+        elif customer_id in rerun_openings:
+            opening = rerun_openings[customer_id]
+        else:
+            opening = round((balances.get(customer_id) or 0.0) + (act.payments + act.later_payments
+                                                                   if act else 0.0), 2)
+        purchases = round(act.purchases, 2) if act else 0.0
+        payments = round(act.payments, 2) if act else 0.0
+        emi = round(installments.get(customer_id) or 0.0, 2)
+        emi_credits = round(credits.get(customer_id) or 0.0, 2)
+        amounts = compute_statement(opening, emi_credits, purchases, emi, payments,
+                                    act.payments_by_due if act else 0.0,
+                                    prev.min_due if prev else 0.0)
+        statements.append({
+            "customer_id": customer_id,
+            "cycle": cycle,
+            "period_start": start,
+            "period_end": end,
+            "opening_balance": opening,
+            "emi_credits": emi_credits,
+            "purchases": purchases,
+            "emi_installments": emi,
+            "payments": payments,
+            "due_date": due_date,
+            "generated_at": now,
+            **amounts,
+            "live_balance": round(max(amounts["total_outstanding"] + (
+                act.later_purchases - act.later_payments if act else 0.0), 0.0), 2),
+        })
+    return statements
+
+
+def save_chunk(db: Session, run: BillingRun, statements):
+    """Writes statements, customer balances and the checkpoint in one transaction.
+
+    Statements stay as of the cycle end; `balance_due` also keeps anything posted since.
+    """
+    db.execute(delete(Statement).where(
+        Statement.cycle == statements[0]["cycle"],
+        Statement.customer_id.between(statements[0]["customer_id"], statements[-1]["customer_id"])))
+    db.execute(insert(Statement), [{k: v for k, v in s.items() if k != "live_balance"}
+                                   for s in statements])
+    customers = Customer.__table__
+    db.execute(
+        update(customers).where(customers.c.id == bindparam("b_id")).values(
+            balance_due=bindparam("b_balance"), min_due=bindparam("b_min_due"),
+            due_date=bindparam("b_due_date")),
+        [{"b_id": s["customer_id"], "b_balance": s["live_balance"],
+          "b_min_due": s["min_due"], "b_due_date": s["due_date"]} for s in statements],
+    )
+    run.last_customer_id = statements[-1]["customer_id"]
+    run.processed += len(statements)
+    run.updated_at = datetime.utcnow()
+    db.commit()
+
+
+def latest_billed_cycle(db: Session):
+    """Newest cycle with a statement or a completed run, or None before the first run."""
+    return max(filter(None, [
+        db.scalar(select(func.max(Statement.cycle))),
+        db.scalar(select(func.max(BillingRun.cycle)).where(BillingRun.status == "completed")),
+    ]), default=None)
+
+
+def check_cycle(db: Session, cycle: str):
+    """Raises ValueError unless `cycle` has ended and is not older than the latest billed cycle."""
+    if cycle_bounds(cycle)[1] >= date.today():
+        # Transactions still to come would never be billed once the run is completed
+        raise ValueError(f"Cycle {cycle} has not ended yet; only past cycles can be billed")
+    latest = latest_billed_cycle(db)
+    if latest and cycle < latest:
+        # Its opening balance would come from balance_due, which already includes later statements
+        raise ValueError(f"Cycle {cycle} is older than the latest billed cycle {latest}; "
+                         f"only {latest} or a later cycle can be billed")
+
+
+def run_billing_cycle(db: Session, cycle: str, chunk_size=DEFAULT_CHUNK_SIZE, force=False, report=print):
+    """Generates all statements for `cycle`, resuming from the checkpoint if one exists.
+
+    Returns the number of customers processed by this call.
+    """
+    check_cycle(db, cycle)
+    run = db.get(BillingRun, cycle)
+    if run and force:
+        # Existing statements are replaced chunk by chunk, keeping their opening balances
+        db.delete(run)
+        db.commit()
+        run = None
+    if run and run.status == "completed":
+        report(f"Cycle {cycle} already completed ({run.processed:,} customers). Use --force to rerun.")
+        return 0
+    if run is None:
+        run = BillingRun(cycle=cycle, status="running", processed=0)
+        db.add(run)
+        db.commit()
+    elif run.last_customer_id:
+        report(f"Resuming cycle {cycle} after {run.last_customer_id} ({run.processed:,} done)")
+
+    processed = 0
+    started = time.perf_counter()
+    while True:
+        query = select(Customer.id).order_by(Customer.id).limit(chunk_size)
+        if run.last_customer_id:
+            query = query.where(Customer.id > run.last_customer_id)
+        customer_ids = db.execute(query).scalars().all()
+        if not customer_ids:
+            break
+
+        save_chunk(db, run, build_statements(db, cycle, customer_ids))
+        processed += len(customer_ids)
+        elapsed = time.perf_counter() - started
+        report(f"  {run.processed:,} customers billed, {processed / elapsed:,.0f} customers/sec")
+
+    run.status = "completed"
+    run.updated_at = datetime.utcnow()
+    db.commit()
+    # Balances and due dates moved, so the collections buckets are stale
+    score_all_customers(db)
+    return processed
+
+
+def parse_args(argv=None):
+    default_cycle = add_months(cycle_of(date.today()), -1)
+    parser = argparse.ArgumentParser(description="Generate billing-cycle statements.")
+    parser.add_argument("--cycle", default=default_cycle,
+                        help=f"Cycle to bill as YYYY-MM (default: last month, {default_cycle})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Customers per committed chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate the latest billed cycle's statements, ignoring its checkpoint")
+    args = parser.parse_args(argv)
+    try:
+        cycle_bounds(args.cycle)
+    except ValueError:
+        parser.error("--cycle must look like YYYY-MM")
+    db = SessionLocal()
+    try:
+        check_cycle(db, args.cycle)
+    except ValueError as exc:
+        parser.error(str(exc))
+    finally:
+        db.close()
+    return args
+
+
+def main(argv=None):
+    Base.metadata.create_all(bind=engine)
+    args = parse_args(argv)
+    db = SessionLocal()
+    try:
+        print(f"Generating statements for cycle {args.cycle}...")
+        started = time.perf_counter()
+        processed = run_billing_cycle(db, args.cycle, args.chunk_size, args.force)
+        elapsed = time.perf_counter() - started
+        if processed:
+            print(f"Billed {processed:,} customers in {elapsed:.1f}s "
+                  f"({processed / elapsed:,.0f} customers/sec)")
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume from the last checkpoint.",
+              file=sys.stderr)
+        sys.exit(130)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
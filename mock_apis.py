@@ -1,17 +1,29 @@
-from fastapi import FastAPI, HTTPException, status, Depends
+from fastapi import FastAPI, HTTPException, status, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
+import csv
+import io
+import json
+import threading
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 
 # Import local DB setup
-from setup_database import Base, Customer, Transaction, Card, SessionLocal, engine
+from setup_database import (Base, Customer, Transaction, Card, RiskScore, CustomerSpendSummary, EmiPlan,
+                            Statement, SessionLocal, engine)
+from billing import add_months, cycle_bounds, cycle_of, statement_period_label
+from risk_scoring import (RISK_CRITICAL, RISK_LEVELS, catch_up_scores, get_customer_score,
+                          refresh_customer_score)
+from spend_analytics import (EMI_CATEGORY_SUFFIX, PAYMENT_CATEGORY, record_emi_conversion,
+                             record_transaction)
 
 Base.metadata.create_all(bind=engine)
 
+
 app = FastAPI(title="OneCard Core Banking System", version="3.0")
 
 app.add_middleware(
@@ -31,6 +43,71 @@ def get_db():
     finally:
         db.close()
 
+
+# Rows fetched per round-trip when streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    Transaction.id, Transaction.customer_id, Transaction.merchant,
+    Transaction.amount, Transaction.category, Transaction.date,
+    Transaction.is_emi, Transaction.dispute_status,
+]
+EXPORT_FIELDS = [col.key for col in EXPORT_COLUMNS]
+
+
+def build_export_query(customer_id: Optional[str], start_date: Optional[date], end_date: Optional[date]):
+    """Builds the column-only SELECT behind the export endpoints (end_date is inclusive)."""
+    query = select(*EXPORT_COLUMNS)
+    if customer_id:
+        query = query.where(Transaction.customer_id == customer_id)
+    if start_date:
+        query = query.where(Transaction.date >= datetime.combine(
+            start_date, datetime.min.time()))
+    if end_date:
+        query = query.where(Transaction.date < datetime.combine(
+            end_date + timedelta(days=1), datetime.min.time()))
+    return query.order_by(Transaction.date, Transaction.id)
+
+
+def iter_export_batches(query):
+    """Yields lists of rows from a server-side cursor, one batch at a time.
+
+    The generator owns its session because StreamingResponse keeps pulling
+    rows after the request-scoped `get_db` session may have been closed.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(
+            stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def stream_ndjson(query):
+    for batch in iter_export_batches(query):
+        lines = []
+        for row in batch:
+            record = dict(zip(EXPORT_FIELDS, row))
+            record["date"] = record["date"].isoformat() if record["date"] else None
+            lines.append(json.dumps(record))
+        yield "\n".join(lines) + "\n"
+
+
+def stream_csv(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in iter_export_batches(query):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Header only when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
+
 # --- Pydantic Request Models ---
 
 
@@ -57,12 +134,127 @@ class DisputeRequest(BaseModel):
 class CardControlRequest(BaseModel):
     action: str  # block, unblock, freeze
 
+# --- Pydantic Response Models ---
+
+
+class AccountOpenResponse(BaseModel):
+    customer_id: str
+    message: str
+
+
+class AccountDetailsResponse(BaseModel):
+    name: str
+    status: str
+    credit_limit: float
+    available_limit: float
+    reward_points: float
+
+
+class CardTrackResponse(BaseModel):
+    card_number_mask: str
+    delivery_status: str
+    tracking_id: Optional[str] = None
+    estimated_arrival: str
+
+
+class CardControlResponse(BaseModel):
+    status: str
+    new_card_status: str
+    message: str
+
+
+class BillSummaryResponse(BaseModel):
+    total_outstanding: float
+    min_due: float
+    due_date: str
+    is_overdue: bool
+    statement_period: str
+
+
+class PaymentResponse(BaseModel):
+    status: str
+    new_balance: float
+    txn_ref: str
+
+
+class TransactionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    customer_id: Optional[str] = None
+    merchant: Optional[str] = None
+    amount: float
+    category: Optional[str] = None
+    date: Optional[datetime] = None
+    is_emi: bool = False
+    dispute_status: Optional[str] = None
+
+
+class TransactionListResponse(BaseModel):
+    count: int
+    transactions: List[TransactionOut]
+
+
+class EMIResponse(BaseModel):
+    status: str
+    monthly_emi: float
+    tenure: int
+    message: str
+
+
+class DisputeResponse(BaseModel):
+    ticket_id: str
+    status: str
+
+
+class CollectionsStatusResponse(BaseModel):
+    risk_level: str
+    agent_assigned: bool
+    settlement_offer_available: bool
+    message: str
+
+
+class RiskBucketEntry(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    customer_id: str
+    balance_due: Optional[float] = None
+    due_date: Optional[date] = None
+    as_of: date
+
+
+class RiskBucketResponse(BaseModel):
+    risk_level: str
+    count: int
+    customers: List[RiskBucketEntry]
+    next_after: Optional[str] = None  # Pass as `after` to fetch the next page
+
+
+class SpendBucket(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    month: str
+    category: str
+    total_amount: float
+    txn_count: int
+    emi_amount: float
+    emi_count: int
+
+
+class SpendSummaryResponse(BaseModel):
+    customer_id: str
+    month: Optional[str] = None
+    category: Optional[str] = None
+    total_spend: float  # Excludes bill payments
+    txn_count: int
+    breakdown: List[SpendBucket]
+
 # ==========================================
 # 1. ACCOUNT & ONBOARDING
 # ==========================================
 
 
-@app.post("/account/open", tags=["Account"])
+@app.post("/account/open", response_model=AccountOpenResponse, tags=["Account"])
 def open_account(req: AccountOpenRequest, db: Session = Depends(get_db)):
     """Simulates new user onboarding."""
     if db.query(Customer).filter(Customer.phone == req.phone).first():
@@ -77,11 +269,13 @@ def open_account(req: AccountOpenRequest, db: Session = Depends(get_db)):
         credit_limit=50000.0
     )
     db.add(new_cust)
+    db.flush()
+    refresh_customer_score(db, new_cust)
     db.commit()
     return {"customer_id": new_cust.id, "message": "Account created. KYC Pending."}
 
 
-@app.get("/account/details/{customer_id}", tags=["Account"])
+@app.get("/account/details/{customer_id}", response_model=AccountDetailsResponse, tags=["Account"])
 def get_account_details(customer_id: str, db: Session = Depends(get_db)):
     """Fetch holistic account view including rewards."""
     cust = db.query(Customer).filter(Customer.id == customer_id).first()
@@ -101,7 +295,7 @@ def get_account_details(customer_id: str, db: Session = Depends(get_db)):
 # ==========================================
 
 
-@app.get("/card/track/{customer_id}", tags=["Card"])
+@app.get("/card/track/{customer_id}", response_model=CardTrackResponse, tags=["Card"])
 def track_card(customer_id: str, db: Session = Depends(get_db)):
     """Returns delivery status for physical kits."""
     card = db.query(Card).filter(Card.customer_id == customer_id).first()
@@ -117,7 +311,7 @@ def track_card(customer_id: str, db: Session = Depends(get_db)):
     }
 
 
-@app.post("/card/control/{customer_id}", tags=["Card"])
+@app.post("/card/control/{customer_id}", response_model=CardControlResponse, tags=["Card"])
 def manage_card_security(customer_id: str, req: CardControlRequest, db: Session = Depends(get_db)):
     """Handle locking/unlocking cards (Security)."""
     card = db.query(Card).filter(Card.customer_id == customer_id).first()
@@ -144,24 +338,32 @@ def manage_card_security(customer_id: str, req: CardControlRequest, db: Session
 # ==========================================
 
 
-@app.get("/bill/summary/{customer_id}", tags=["Billing"])
+@app.get("/bill/summary/{customer_id}", response_model=BillSummaryResponse, tags=["Billing"])
 def get_bill(customer_id: str, db: Session = Depends(get_db)):
     cust = db.query(Customer).filter(Customer.id == customer_id).first()
     if not cust:
         raise HTTPException(404, "Customer not found")
 
-    overdue = cust.due_date and cust.due_date < datetime.now().date()
+    overdue = bool(cust.due_date and cust.due_date < datetime.now().date())
+
+    # Latest generated statement (see billing.py), else last calendar month
+    statement = db.query(Statement).filter(Statement.customer_id == customer_id)\
+                  .order_by(desc(Statement.cycle)).first()
+    if statement:
+        period = (statement.period_start, statement.period_end)
+    else:
+        period = cycle_bounds(add_months(cycle_of(datetime.now()), -1))
 
     return {
         "total_outstanding": cust.balance_due,
         "min_due": cust.min_due,
         "due_date": str(cust.due_date),
         "is_overdue": overdue,
-        "statement_period": "Nov 1 - Nov 30"
+        "statement_period": statement_period_label(*period)
     }
 
 
-@app.post("/payment/pay/{customer_id}", tags=["Billing"])
+@app.post("/payment/pay/{customer_id}", response_model=PaymentResponse, tags=["Billing"])
 def make_payment(customer_id: str, req: PaymentRequest, db: Session = Depends(get_db)):
     cust = db.query(Customer).filter(Customer.id == customer_id).first()
     if not cust:
@@ -176,10 +378,13 @@ def make_payment(customer_id: str, req: PaymentRequest, db: Session = Depends(ge
         customer_id=customer_id,
         merchant="OneCard Payment",
         amount=req.amount,
-        category="Payment",
+        category=PAYMENT_CATEGORY,
         date=datetime.utcnow()
     )
     db.add(pay_txn)
+    record_transaction(db, pay_txn)
+    # Keep the collections bucket current in the same transaction
+    refresh_customer_score(db, cust)
     db.commit()
 
     return {"status": "success", "new_balance": cust.balance_due, "txn_ref": pay_txn.id}
@@ -189,28 +394,73 @@ def make_payment(customer_id: str, req: PaymentRequest, db: Session = Depends(ge
 # ==========================================
 
 
-@app.get("/transactions/list/{customer_id}", tags=["Transactions"])
+@app.get("/transactions/list/{customer_id}", response_model=TransactionListResponse, tags=["Transactions"])
 def list_transactions(customer_id: str, limit: int = 5, db: Session = Depends(get_db)):
     txns = db.query(Transaction).filter(Transaction.customer_id == customer_id)\
              .order_by(desc(Transaction.date)).limit(limit).all()
     return {"count": len(txns), "transactions": txns}
 
 
-@app.post("/transactions/convert_emi", tags=["Transactions"])
+@app.get("/transactions/export/ndjson", response_class=StreamingResponse, tags=["Transactions"])
+def export_transactions_ndjson(customer_id: Optional[str] = None, start_date: Optional[date] = None,
+                               end_date: Optional[date] = None):
+    """Streams matching transactions as newline-delimited JSON (constant memory)."""
+    query = build_export_query(customer_id, start_date, end_date)
+    return StreamingResponse(stream_ndjson(query), media_type="application/x-ndjson")
+
+
+@app.get("/transactions/export/csv", response_class=StreamingResponse, tags=["Transactions"])
+def export_transactions_csv(customer_id: Optional[str] = None, start_date: Optional[date] = None,
+                            end_date: Optional[date] = None):
+    """Streams matching transactions as CSV with a header row (constant memory)."""
+    query = build_export_query(customer_id, start_date, end_date)
+    return StreamingResponse(
+        stream_csv(query),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=transactions.csv"},
+    )
+
+
+@app.post("/transactions/convert_emi", response_model=EMIResponse, tags=["Transactions"])
 def convert_emi(req: EMIRequest, db: Session = Depends(get_db)):
     txn = db.query(Transaction).filter(Transaction.id == req.txn_id).first()
     if not txn:
         raise HTTPException(404, "Transaction not found")
 
+    if txn.category == PAYMENT_CATEGORY:
+        raise HTTPException(400, "Payments cannot be converted to EMI.")
+    if txn.is_emi:
+        raise HTTPException(400, "Transaction is already converted to EMI.")
     if txn.amount < 2500:
         raise HTTPException(400, "Transaction too small for EMI (Min 2500).")
+    if req.tenure_months < 1:
+        raise HTTPException(400, "Tenure must be at least 1 month.")
 
     interest = 0.15  # 15% PA mock
     total_pay = txn.amount * (1 + (interest * req.tenure_months/12))
     monthly = total_pay / req.tenure_months
 
+    # Installments start with the first cycle not yet billed for this customer. If the
+    # purchase itself was already billed, that statement also credits the principal back.
+    purchase_cycle = cycle_of(txn.date or datetime.utcnow())
+    last_billed = db.scalar(select(func.max(Statement.cycle))
+                            .where(Statement.customer_id == txn.customer_id))
+    already_billed = last_billed is not None and last_billed >= purchase_cycle
+    first_cycle = add_months(last_billed, 1) if already_billed else purchase_cycle
+
+    record_emi_conversion(db, txn)
+    db.add(EmiPlan(
+        txn_id=txn.id,
+        customer_id=txn.customer_id,
+        principal=txn.amount,
+        tenure_months=req.tenure_months,
+        monthly_installment=round(monthly, 2),
+        first_cycle=first_cycle,
+        last_cycle=add_months(first_cycle, req.tenure_months - 1),
+        credit_cycle=first_cycle if already_billed else None,
+    ))
     txn.is_emi = True
-    txn.category += " (Converted to EMI)"
+    txn.category += EMI_CATEGORY_SUFFIX
     db.commit()
 
     return {
@@ -221,7 +471,7 @@ def convert_emi(req: EMIRequest, db: Session = Depends(get_db)):
     }
 
 
-@app.post("/transactions/dispute", tags=["Transactions"])
+@app.post("/transactions/dispute", response_model=DisputeResponse, tags=["Transactions"])
 def report_dispute(req: DisputeRequest, db: Session = Depends(get_db)):
     txn = db.query(Transaction).filter(Transaction.id == req.txn_id).first()
     if not txn:
@@ -236,15 +486,14 @@ def report_dispute(req: DisputeRequest, db: Session = Depends(get_db)):
 # ==========================================
 
 
-@app.get("/collections/check/{customer_id}", tags=["Collections"])
+@app.get("/collections/check/{customer_id}", response_model=CollectionsStatusResponse, tags=["Collections"])
 def check_collections_status(customer_id: str, db: Session = Depends(get_db)):
-    cust = db.query(Customer).filter(Customer.id == customer_id).first()
-    if not cust:
+    # Logic: High risk if overdue > 5000 AND date passed (precomputed by risk_scoring)
+    score = get_customer_score(db, customer_id)
+    if not score:
         raise HTTPException(404, "Customer not found")
 
-    # Logic: High risk if overdue > 5000 AND date passed
-    is_overdue = cust.due_date and cust.due_date < datetime.now().date()
-    high_risk = is_overdue and cust.balance_due > 5000
+    high_risk = score.risk_level == RISK_CRITICAL
 
     return {
         "risk_level": "CRITICAL" if high_risk else "NORMAL",
@@ -254,6 +503,80 @@ def check_collections_status(customer_id: str, db: Session = Depends(get_db)):
     }
 
 
+# Day this process last ran `catch_up_scores`; the full daily refresh is `make score-risk`
+_scores_caught_up_on = None
+_scores_lock = threading.Lock()
+
+
+def catch_up_risk_scores(db: Session):
+    """Runs the incremental risk catch-up at most once a day per process."""
+    global _scores_caught_up_on
+    today = date.today()
+    if _scores_caught_up_on == today:
+        return
+    with _scores_lock:
+        if _scores_caught_up_on != today:
+            catch_up_scores(db, today)
+            _scores_caught_up_on = today
+
+
+@app.get("/collections/bucket/{level}", response_model=RiskBucketResponse, tags=["Collections"])
+def list_risk_bucket(level: str, after: Optional[str] = None, limit: int = 100, db: Session = Depends(get_db)):
+    """Pages through customers in a risk bucket, ordered by customer_id (keyset pagination)."""
+    level = level.upper()
+    if level not in RISK_LEVELS:
+        raise HTTPException(400, f"Invalid risk level. Use one of: {', '.join(RISK_LEVELS)}")
+    if not 1 <= limit <= 1000:
+        raise HTTPException(400, "limit must be between 1 and 1000")
+
+    catch_up_risk_scores(db)
+    query = db.query(RiskScore).filter(RiskScore.risk_level == level)
+    if after:
+        query = query.filter(RiskScore.customer_id > after)
+    scores = query.order_by(RiskScore.customer_id).limit(limit).all()
+
+    return {
+        "risk_level": level,
+        "count": len(scores),
+        "customers": scores,
+        "next_after": scores[-1].customer_id if len(scores) == limit else None,
+    }
+
+
+# ==========================================
+# 6. ANALYTICS
+# ==========================================
+
+
+@app.get("/analytics/spend/{customer_id}", response_model=SpendSummaryResponse, tags=["Analytics"])
+def get_spend_summary(customer_id: str,
+                      month: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+                      category: Optional[str] = None, db: Session = Depends(get_db)):
+    """Per-month, per-category spend totals from the precomputed summary table."""
+    if not db.get(Customer, customer_id):
+        raise HTTPException(404, "Customer not found")
+
+    query = db.query(CustomerSpendSummary).filter(
+        CustomerSpendSummary.customer_id == customer_id)
+    if month:
+        query = query.filter(CustomerSpendSummary.month == month)
+    if category:
+        category = category.strip().title()
+        query = query.filter(CustomerSpendSummary.category == category)
+    buckets = query.order_by(desc(CustomerSpendSummary.month),
+                             CustomerSpendSummary.category).all()
+
+    spend = [b for b in buckets if b.category != PAYMENT_CATEGORY]
+    return {
+        "customer_id": customer_id,
+        "month": month,
+        "category": category,
+        "total_spend": round(sum(b.total_amount for b in spend), 2),
+        "txn_count": sum(b.txn_count for b in spend),
+        "breakdown": buckets,
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000)
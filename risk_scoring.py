@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+OneCard Bot - Collections Risk Scoring
+Buckets every customer into a collections risk level and stores the result
+in the `risk_scores` table.
+
+The full refresh is a single set-based INSERT ... SELECT over `customers`;
+single customers are re-scored incrementally (e.g. when a payment lands).
+Scores go stale as due dates pass; run the full refresh daily (the API's
+`catch_up_scores` only fills the gaps between runs):
+
+    python3 risk_scoring.py
+"""
+
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from setup_database import Base, Customer, RiskScore, SessionLocal, engine
+
+RISK_CRITICAL = "CRITICAL"
+RISK_NORMAL = "NORMAL"
+RISK_LEVELS = [RISK_CRITICAL, RISK_NORMAL]
+
+# High risk: past the due date AND more than this much outstanding
+CRITICAL_BALANCE = 5000
+
+
+def compute_risk_level(balance_due, due_date, today) -> str:
+    """Risk rule for a single customer; mirrors `risk_level_expr`."""
+    is_overdue = due_date is not None and due_date < today
+    if is_overdue and (balance_due or 0) > CRITICAL_BALANCE:
+        return RISK_CRITICAL
+    return RISK_NORMAL
+
+
+def risk_level_expr(today, model=Customer):
+    """Risk rule as a SQL expression over `model` (`customers` or `risk_scores`); mirrors `compute_risk_level`."""
+    return case(
+        (and_(model.due_date < today, model.balance_due > CRITICAL_BALANCE), RISK_CRITICAL),
+        else_=RISK_NORMAL,
+    )
+
+
+def score_all_customers(db: Session, today=None) -> int:
+    """Recomputes every customer's score in one set-based pass. Returns rows written."""
+    today = today or datetime.now().date()
+    db.execute(delete(RiskScore))
+    result = db.execute(
+        insert(RiskScore).from_select(
+            ["customer_id", "risk_level", "balance_due", "due_date", "as_of"],
+            select(Customer.id, risk_level_expr(today), Customer.balance_due,
+                   Customer.due_date, literal(today, RiskScore.as_of.type)),
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def catch_up_scores(db: Session, today=None) -> int:
+    """Incremental catch-up between full refreshes. Returns rows written.
+
+    Scores customers that have no row yet, and re-scores only the rows whose
+    due date has passed since they were scored; every other bucket only moves
+    when the customer changes, which re-scores it directly.
+    """
+    today = today or datetime.now().date()
+    missing = db.execute(
+        insert(RiskScore).from_select(
+            ["customer_id", "risk_level", "balance_due", "due_date", "as_of"],
+            select(Customer.id, risk_level_expr(today), Customer.balance_due,
+                   Customer.due_date, literal(today, RiskScore.as_of.type))
+            .outerjoin(RiskScore, RiskScore.customer_id == Customer.id)
+            .where(RiskScore.customer_id.is_(None)),
+        )
+    )
+    crossed = db.execute(
+        update(RiskScore)
+        .where(RiskScore.due_date >= RiskScore.as_of, RiskScore.due_date < today)
+        .values(risk_level=risk_level_expr(today, RiskScore), as_of=today)
+    )
+    db.commit()
+    return missing.rowcount + crossed.rowcount
+
+
+def refresh_customer_score(db: Session, customer: Customer, today=None) -> RiskScore:
+    """Re-scores one customer. Does not commit, so callers can fold it into their transaction."""
+    today = today or datetime.now().date()
+    score = db.get(RiskScore, customer.id)
+    if score is None:
+        score = RiskScore(customer_id=customer.id)
+        db.add(score)
+    score.risk_level = compute_risk_level(customer.balance_due, customer.due_date, today)
+    score.balance_due = customer.balance_due
+    score.due_date = customer.due_date
+    score.as_of = today
+    return score
+
+
+def get_customer_score(db: Session, customer_id: str, today=None):
+    """Returns the precomputed score, re-scoring it first if missing or stale.
+
+    Returns None if the customer does not exist.
+    """
+    today = today or datetime.now().date()
+    score = db.get(RiskScore, customer_id)
+    if score is not None and score.as_of >= today:
+        return score
+
+    customer = db.get(Customer, customer_id)
+    if customer is None:
+        return None
+    score = refresh_customer_score(db, customer, today)
+    db.commit()
+    return score
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("Scoring all customers...")
+        started = time.perf_counter()
+        scored = score_all_customers(db)
+        elapsed = time.perf_counter() - started
+
+        counts = dict(db.execute(
+            select(RiskScore.risk_level, func.count()).group_by(RiskScore.risk_level)).all())
+        print(f"Scored {scored:,} customers in {elapsed:.2f}s "
+              f"({scored / elapsed if elapsed else 0:,.0f} customers/sec)")
+        for level in RISK_LEVELS:
+            print(f"  {level:<9} {counts.get(level, 0):,}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+OneCard Bot - Load-Test Data Generator
+Seeds the core-banking DB with synthetic customers, cards and transactions
+at configurable scale (e.g. 1M customers / 50M transactions).
+
+Rows are generated in chunks with vectorized NumPy draws and written with
+bulk Core INSERTs, one database transaction per chunk. Generation can be
+spread across worker processes while the main process does the inserts.
+
+Usage:
+    python3 seed_load_data.py --customers 1000000 --txns-per-customer 50 --workers 4
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from faker import Faker
+from sqlalchemy import create_engine, event, func, select
+
+from setup_database import Base, Customer, Card, Transaction, DATABASE_URL
+
+CATEGORIES = ["Food", "Travel", "Utilities", "Shopping", "Entertainment"]
+DELIVERY_STATUSES = ["delivered", "in_transit", "pending"]
+CREDIT_LIMITS = [50000.0, 100000.0, 200000.0]
+# Transaction IDs are customer_index * TXN_ID_STRIDE + seq, so seq must stay below it
+TXN_ID_STRIDE = 1000
+
+# Size of the Faker-generated pools that rows draw names/merchants from
+NAME_POOL_SIZE = 2000
+MERCHANT_POOL_SIZE = 500
+
+# Load-test IDs carry an "lt" marker so they never collide with the regular seed
+CUSTOMER_ID_FMT = "cust_lt{:08d}"
+TXN_ID_FMT = "txn_lt{:010d}"
+
+_pools = {}
+
+
+def get_pools(seed):
+    """Returns (names, merchants), built once per process from a seeded Faker."""
+    if seed not in _pools:
+        fake = Faker('en_IN')
+        fake.seed_instance(seed)
+        names = [fake.name() for _ in range(NAME_POOL_SIZE)]
+        merchants = [fake.company() for _ in range(MERCHANT_POOL_SIZE)]
+        _pools[seed] = (names, merchants)
+    return _pools[seed]
+
+
+def generate_chunk(chunk_index, first_customer, n_customers, seed, txns_per_customer, days, now):
+    """Generates one chunk of rows as lists of dicts ready for executemany.
+
+    Each chunk draws from its own RNG stream seeded with (seed, chunk_index),
+    so the output is identical regardless of the number of workers.
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+    names, merchants = get_pools(seed)
+    cust_idx = np.arange(first_customer, first_customer + n_customers)
+    cust_ids = [CUSTOMER_ID_FMT.format(i) for i in cust_idx]
+
+    # --- Customers ---
+    is_overdue = rng.random(n_customers) < 1 / 3
+    balance = np.where(is_overdue, np.round(rng.uniform(1000, 50000, n_customers), 2), 0.0)
+    due_offsets = rng.integers(-5, 21, n_customers)
+    today = now.date()
+    customers = [
+        {
+            "id": cid,
+            "name": names[n],
+            "phone": f"+91 9{i:09d}",
+            "status": "verified",
+            "credit_limit": limit,
+            "balance_due": bal,
+            "min_due": round(bal * 0.05, 2),
+            "due_date": today + timedelta(days=off),
+            "reward_points": float(points),
+        }
+        for cid, i, n, limit, bal, off, points in zip(
+            cust_ids,
+            cust_idx.tolist(),
+            rng.integers(0, len(names), n_customers).tolist(),
+            rng.choice(CREDIT_LIMITS, n_customers).tolist(),
+            balance.tolist(),
+            due_offsets.tolist(),
+            rng.integers(0, 5001, n_customers).tolist(),
+        )
+    ]
+
+    # --- Cards ---
+    cards = [
+        {
+            "id": f"card_lt{i:08d}",
+            "customer_id": cid,
+            "card_number": f"4{i:015d}",
+            "status": "active",
+            "delivery_status": DELIVERY_STATUSES[d],
+            "tracking_id": f"TRK_LT{i:08d}",
+            "is_physical": True,
+        }
+        for cid, i, d in zip(cust_ids, cust_idx.tolist(),
+                             rng.integers(0, len(DELIVERY_STATUSES), n_customers).tolist())
+    ]
+
+    # --- Transactions ---
+    # Capped so a large draw cannot spill into the next customer's ID range
+    per_customer = np.minimum(rng.poisson(txns_per_customer, n_customers), TXN_ID_STRIDE - 1)
+    n_txns = int(per_customer.sum())
+    # Transaction IDs are derived from the customer index so chunks never overlap
+    owner = np.repeat(np.arange(n_customers), per_customer)
+    seq = np.arange(n_txns) - np.repeat(np.cumsum(per_customer) - per_customer, per_customer)
+    txn_numbers = (cust_idx[owner].astype(np.int64) * TXN_ID_STRIDE + seq).tolist()
+    amounts = np.round(rng.uniform(100, 10000, n_txns), 2).tolist()
+    seconds_ago = rng.integers(0, days * 86400, n_txns)
+    dates = (np.datetime64(now, "us") - seconds_ago.astype("timedelta64[s]")).tolist()
+    transactions = [
+        {
+            "id": TXN_ID_FMT.format(t),
+            "customer_id": cust_ids[o],
+            "merchant": merchants[m],
+            "amount": a,
+            "category": CATEGORIES[c],
+            "date": d,
+            "is_emi": False,
+            "dispute_status": "none",
+        }
+        for t, o, m, a, c, d in zip(
+            txn_numbers,
+            owner.tolist(),
+            rng.integers(0, len(merchants), n_txns).tolist(),
+            amounts,
+            rng.integers(0, len(CATEGORIES), n_txns).tolist(),
+            dates,
+        )
+    ]
+
+    return chunk_index, customers, cards, transactions
+
+
+def make_engine(url):
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _bulk_load_pragmas(dbapi_conn, _):
+            # Durability is irrelevant for throwaway load-test data
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA synchronous=OFF")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.execute("PRAGMA cache_size=-200000")
+            cur.close()
+    return engine
+
+
+def insert_chunk(engine, customers, cards, transactions):
+    """Writes one chunk inside a single database transaction."""
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), customers)
+        conn.execute(Card.__table__.insert(), cards)
+        if transactions:
+            conn.execute(Transaction.__table__.insert(), transactions)
+
+
+def iter_chunks(args, now):
+    """Yields generated chunks in order, from worker processes when --workers > 1."""
+    specs = []
+    for chunk_index, first in enumerate(range(0, args.customers, args.chunk_size)):
+        count = min(args.chunk_size, args.customers - first)
+        specs.append((chunk_index, first, count, args.seed, args.txns_per_customer, args.days, now))
+
+    if args.workers <= 1:
+        for spec in specs:
+            yield generate_chunk(*spec)
+        return
+
+    # Keep a bounded number of chunks in flight so memory stays flat
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pending = deque()
+        for spec in specs:
+            pending.append(pool.submit(generate_chunk, *spec))
+            if len(pending) >= args.workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the core-banking DB with load-test data.")
+    parser.add_argument("--customers", type=int, default=10000,
+                        help="Number of customers to generate (default: 10000)")
+    parser.add_argument("--txns-per-customer", type=float, default=50,
+                        help="Mean transactions per customer, Poisson-distributed (default: 50)")
+    parser.add_argument("--days", type=int, default=90,
+                        help="Spread transaction dates over this many past days (default: 90)")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(),
+                        help="Date (YYYY-MM-DD) transaction and due dates are relative to (default: today)")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="Customers generated and committed per chunk (default: 10000)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Random seed; same seed, scale and --as-of give identical data (default: 42)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used for row generation (default: 1)")
+    parser.add_argument("--database-url", default=DATABASE_URL,
+                        help=f"Target database (default: {DATABASE_URL})")
+    parser.add_argument("--reset", action="store_true",
+                        help="Drop and recreate all tables before seeding")
+    args = parser.parse_args(argv)
+    if args.txns_per_customer >= TXN_ID_STRIDE:
+        parser.error(f"--txns-per-customer must be below {TXN_ID_STRIDE}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    engine = make_engine(args.database_url)
+
+    if args.reset:
+        print("Dropping existing tables...")
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(Customer.__table__)
+                                .where(Customer.id.like("cust_lt%"))).scalar()
+    if existing:
+        print(f"Database already contains {existing} load-test customers. "
+              "Use --reset to regenerate.", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Seeding {args.customers} customers (~{args.txns_per_customer:g} txns each) "
+          f"with seed={args.seed}, as-of={args.as_of}, chunk={args.chunk_size}, "
+          f"workers={args.workers}...")
+
+    # Transactions fall in the `days` before midnight of the as-of date
+    now = datetime.combine(args.as_of, datetime.min.time())
+    totals = {"customers": 0, "cards": 0, "transactions": 0}
+    insert_time = 0.0
+    started = time.perf_counter()
+
+    for chunk_index, customers, cards, transactions in iter_chunks(args, now):
+        t0 = time.perf_counter()
+        insert_chunk(engine, customers, cards, transactions)
+        insert_time += time.perf_counter() - t0
+
+        totals["customers"] += len(customers)
+        totals["cards"] += len(cards)
+        totals["transactions"] += len(transactions)
+        rows = sum(totals.values())
+        elapsed = time.perf_counter() - started
+        print(f"  chunk {chunk_index + 1}: {totals['customers']}/{args.customers} customers, "
+              f"{totals['transactions']} txns, {rows / elapsed:,.0f} rows/sec")
+
+    elapsed = time.perf_counter() - started
+    rows = sum(totals.values())
+    print("Seeding Complete.")
+    print(f"  customers:    {totals['customers']:,}")
+    print(f"  cards:        {totals['cards']:,}")
+    print(f"  transactions: {totals['transactions']:,}")
+    print(f"  elapsed:      {elapsed:.1f}s (insert {insert_time:.1f}s)")
+    print(f"  throughput:   {rows / elapsed:,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
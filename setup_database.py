@@ -1,12 +1,13 @@
+import os
 import random
 import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, Column, String, Float, DateTime, ForeignKey, Date, Boolean
+from sqlalchemy import create_engine, Column, String, Float, Integer, DateTime, ForeignKey, Date, Boolean, Index
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from faker import Faker
 
 # --- Database Config ---
-DATABASE_URL = "sqlite:///./onecard.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./onecard.db")
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -47,16 +48,87 @@ class Card(Base):
 class Transaction(Base):
     __tablename__ = "transactions"
     id = Column(String, primary_key=True, index=True)
-    customer_id = Column(String, ForeignKey("customers.id"))
+    customer_id = Column(String, ForeignKey("customers.id"), index=True)
     merchant = Column(String)
     amount = Column(Float)
     category = Column(String)
-    date = Column(DateTime, default=datetime.utcnow)
+    date = Column(DateTime, default=datetime.utcnow, index=True)
     is_emi = Column(Boolean, default=False)
     dispute_status = Column(String, default="none")  # none, open, resolved
 
     customer = relationship("Customer", back_populates="transactions")
 
+
+class EmiPlan(Base):
+    """Installment schedule for a transaction converted to EMI."""
+    __tablename__ = "emi_plans"
+    txn_id = Column(String, ForeignKey("transactions.id"), primary_key=True)
+    customer_id = Column(String, ForeignKey("customers.id"), index=True)
+    principal = Column(Float, nullable=False)
+    tenure_months = Column(Integer, nullable=False)
+    monthly_installment = Column(Float, nullable=False)
+    first_cycle = Column(String, nullable=False)  # YYYY-MM of the first billed installment
+    last_cycle = Column(String, nullable=False)  # YYYY-MM of the last billed installment
+    # Set when the purchase was already on a statement: YYYY-MM whose statement credits the principal back
+    credit_cycle = Column(String, nullable=True)
+
+
+class Statement(Base):
+    """Billing-cycle statement per customer (see billing.py)."""
+    __tablename__ = "statements"
+    customer_id = Column(String, ForeignKey("customers.id"), primary_key=True)
+    cycle = Column(String, primary_key=True)  # YYYY-MM
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    opening_balance = Column(Float, nullable=False, default=0.0)
+    emi_credits = Column(Float, nullable=False, default=0.0)
+    purchases = Column(Float, nullable=False, default=0.0)
+    emi_installments = Column(Float, nullable=False, default=0.0)
+    payments = Column(Float, nullable=False, default=0.0)
+    interest = Column(Float, nullable=False, default=0.0)
+    late_fee = Column(Float, nullable=False, default=0.0)
+    total_outstanding = Column(Float, nullable=False, default=0.0)
+    min_due = Column(Float, nullable=False, default=0.0)
+    due_date = Column(Date, nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class BillingRun(Base):
+    """Checkpoint for a statement-generation run, one row per cycle."""
+    __tablename__ = "billing_runs"
+    cycle = Column(String, primary_key=True)
+    status = Column(String, default="running")  # running, completed
+    last_customer_id = Column(String, nullable=True)  # Customers are processed in id order
+    processed = Column(Integer, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CustomerSpendSummary(Base):
+    """Per-customer, per-month, per-category totals (see spend_analytics.py)."""
+    __tablename__ = "customer_spend_summary"
+    customer_id = Column(String, ForeignKey("customers.id"), primary_key=True)
+    month = Column(String, primary_key=True)  # YYYY-MM
+    category = Column(String, primary_key=True)  # Without the EMI suffix
+    total_amount = Column(Float, nullable=False, default=0.0)
+    txn_count = Column(Integer, nullable=False, default=0)
+    emi_amount = Column(Float, nullable=False, default=0.0)  # Part of total converted to EMI
+    emi_count = Column(Integer, nullable=False, default=0)
+
+
+class RiskScore(Base):
+    """Precomputed collections risk per customer (see risk_scoring.py)."""
+    __tablename__ = "risk_scores"
+    customer_id = Column(String, ForeignKey("customers.id"), primary_key=True)
+    risk_level = Column(String, nullable=False)  # CRITICAL, NORMAL
+    balance_due = Column(Float, default=0.0)
+    due_date = Column(Date, nullable=True, index=True)
+    as_of = Column(Date, nullable=False)  # Day the score was computed for
+
+    # Serves keyset pagination of /collections/bucket/{level}
+    __table_args__ = (Index("ix_risk_scores_level_customer",
+                            "risk_level", "customer_id"),)
+
 # --- Seeding Logic ---
 
 
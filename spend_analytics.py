@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+OneCard Bot - Spend Analytics
+Maintains `customer_spend_summary`: per-customer, per-month, per-category
+totals and counts, so spend questions are an index lookup instead of an
+aggregate scan over `transactions`.
+
+The API keeps it current in the same DB transaction as every change
+(`record_transaction`, `record_emi_conversion`). Rows written outside the
+API (seeding scripts) need a one-off backfill:
+
+    python3 spend_analytics.py
+"""
+
+import time
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from setup_database import Base, CustomerSpendSummary, SessionLocal, Transaction, engine
+
+EMI_CATEGORY_SUFFIX = " (Converted to EMI)"
+# Recorded like any other category but not counted as spend
+PAYMENT_CATEGORY = "Payment"
+
+
+def base_category(category) -> str:
+    """Category with the EMI suffix stripped, e.g. 'Travel (Converted to EMI)' -> 'Travel'."""
+    category = category or "Uncategorized"
+    if category.endswith(EMI_CATEGORY_SUFFIX):
+        return category[:-len(EMI_CATEGORY_SUFFIX)]
+    return category
+
+
+def _upsert(db: Session, customer_id, month, category, amount=0.0, count=0, emi_amount=0.0, emi_count=0):
+    table = CustomerSpendSummary.__table__
+    stmt = sqlite_insert(table).values(
+        customer_id=customer_id, month=month, category=category,
+        total_amount=amount, txn_count=count, emi_amount=emi_amount, emi_count=emi_count,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["customer_id", "month", "category"],
+        set_={
+            "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+            "txn_count": table.c.txn_count + stmt.excluded.txn_count,
+            "emi_amount": table.c.emi_amount + stmt.excluded.emi_amount,
+            "emi_count": table.c.emi_count + stmt.excluded.emi_count,
+        },
+    ))
+
+
+def record_transaction(db: Session, txn: Transaction):
+    """Adds a new transaction to its summary row. Does not commit."""
+    is_emi = bool(txn.is_emi)
+    _upsert(db, txn.customer_id, txn.date.strftime("%Y-%m"), base_category(txn.category),
+            amount=txn.amount, count=1,
+            emi_amount=txn.amount if is_emi else 0.0, emi_count=1 if is_emi else 0)
+
+
+def record_emi_conversion(db: Session, txn: Transaction):
+    """Moves an existing transaction's amount into the EMI columns. Does not commit."""
+    _upsert(db, txn.customer_id, txn.date.strftime("%Y-%m"), base_category(txn.category),
+            emi_amount=txn.amount, emi_count=1)
+
+
+def backfill(db: Session) -> int:
+    """Rebuilds the whole table from `transactions` in one set-based pass. Returns rows written."""
+    category = func.replace(func.coalesce(Transaction.category, "Uncategorized"),
+                            EMI_CATEGORY_SUFFIX, "")
+    month = func.strftime("%Y-%m", Transaction.date)
+    is_emi = func.coalesce(Transaction.is_emi, False)
+    db.execute(delete(CustomerSpendSummary))
+    result = db.execute(
+        insert(CustomerSpendSummary).from_select(
+            ["customer_id", "month", "category", "total_amount", "txn_count",
+             "emi_amount", "emi_count"],
+            select(
+                Transaction.customer_id, month, category,
+                func.sum(Transaction.amount), func.count(),
+                func.sum(case((is_emi, Transaction.amount), else_=literal(0.0))),
+                func.sum(case((is_emi, 1), else_=0)),
+            )
+            .where(Transaction.customer_id.is_not(None), Transaction.date.is_not(None))
+            .group_by(Transaction.customer_id, month, category),
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("Backfilling customer spend summary...")
+        started = time.perf_counter()
+        rows = backfill(db)
+        print(f"Wrote {rows:,} summary rows in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@
 """
 OneCard Bot - Python Startup Script
 Starts all three services and manages them together.
+
+Services start as soon as their dependencies report healthy (independent
+ones start in parallel), readiness is detected by polling each service's
+health URL, and crashed services are restarted with bounded backoff.
 """
 
 import subprocess
@@ -10,8 +14,24 @@ import os
 import signal
 import time
 import shutil
+import threading
+import urllib.error
+import urllib.request
 from pathlib import Path
 
+# Health polling: start fast, back off to at most POLL_MAX_INTERVAL
+POLL_INITIAL_INTERVAL = 0.1
+POLL_MAX_INTERVAL = 2.0
+
+# Crash restarts: RESTART_BASE_DELAY * 2^n seconds, capped, at most MAX_RESTARTS in a row
+RESTART_BASE_DELAY = 1.0
+RESTART_MAX_DELAY = 30.0
+MAX_RESTARTS = 5
+# A service that stays up this long gets its restart budget back
+RESTART_RESET_AFTER = 60.0
+
+SUPERVISE_INTERVAL = 1.0
+
 # Colors for terminal output
 class Colors:
     GREEN = '\033[0;32m'
@@ -20,95 +40,243 @@ class Colors:
     BLUE = '\033[0;34m'
     NC = '\033[0m'  # No Color
 
+_print_lock = threading.Lock()
+
 def print_colored(message, color=Colors.NC):
-    print(f"{color}{message}{Colors.NC}")
+    with _print_lock:
+        print(f"{color}{message}{Colors.NC}")
+
+class Service:
+    """A child process plus its health check, dependencies and restart state."""
+
+    def __init__(self, name, command, health_url, url, cwd=None, depends_on=(), ready_timeout=60):
+        self.name = name
+        self.command = command
+        self.health_url = health_url
+        self.url = url
+        self.cwd = cwd
+        self.depends_on = list(depends_on)
+        self.ready_timeout = ready_timeout
+
+        self.process = None
+        self.ready = threading.Event()
+        self.failed = threading.Event()
+        self.time_to_ready = None
+        self.started_at = None
+        self.restarts = 0
+        self.consecutive_restarts = 0
+        self.next_restart_at = None
+
+    @property
+    def log_path(self):
+        return f"logs/{self.name.lower().replace(' ', '_')}.log"
+
+# Backend tools call the Mock API, so it waits for it; the frontend dev server
+# only needs the backend at request time and can start right away.
+SERVICES = [
+    Service("Mock API", "python3 mock_apis.py",
+            health_url="http://localhost:5000/openapi.json", url="http://localhost:5000"),
+    Service("Backend", "python3 backend.py",
+            health_url="http://localhost:8000/openapi.json", url="http://localhost:8000",
+            depends_on=["Mock API"], ready_timeout=180),  # KB embedding on first run
+    Service("Frontend", "npm run dev", cwd="onecard-bot",
+            health_url="http://localhost:5173/", url="http://localhost:5173"),
+]
 
 def check_dependencies():
     """Check if required dependencies are installed."""
     issues = []
-    
+
     if not shutil.which("python3"):
         issues.append("Python 3 is not installed")
-    
+
     if not shutil.which("npm"):
         issues.append("Node.js/npm is not installed")
-    
+
     if not Path(".env").exists():
         print_colored("⚠️  Warning: .env file not found. Make sure GOOGLE_API_KEY is set.", Colors.YELLOW)
-    
+
     if issues:
         print_colored("❌ Missing dependencies:", Colors.RED)
         for issue in issues:
             print_colored(f"  • {issue}", Colors.RED)
         sys.exit(1)
 
-def start_service(name, command, cwd=None, delay=0):
-    """Start a service and return the process."""
-    print_colored(f"🚀 Starting {name}...", Colors.GREEN)
+def start_service(service, append_log=False):
+    """Start a service's process (logging to logs/) and return it."""
+    print_colored(f"🚀 Starting {service.name}...", Colors.GREEN)
     try:
-        process = subprocess.Popen(
-            command,
+        service.process = subprocess.Popen(
+            service.command,
             shell=True,
-            cwd=cwd,
-            stdout=open(f"logs/{name.lower().replace(' ', '_')}.log", "w"),
-            stderr=subprocess.STDOUT
+            cwd=service.cwd,
+            stdout=open(service.log_path, "a" if append_log else "w"),
+            stderr=subprocess.STDOUT,
+            # Own process group, so `npm run dev` & co. can be stopped as a whole
+            start_new_session=(os.name != "nt")
         )
-        time.sleep(delay)
-        return process
+        service.started_at = time.monotonic()
+        return service.process
     except Exception as e:
-        print_colored(f"❌ Failed to start {name}: {e}", Colors.RED)
+        print_colored(f"❌ Failed to start {service.name}: {e}", Colors.RED)
         sys.exit(1)
 
+def signal_service(proc, sig):
+    """Send a signal to the service's whole process group (just the process on Windows)."""
+    try:
+        if os.name == "nt":
+            proc.terminate()
+        else:
+            os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def is_healthy(url):
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            return resp.status < 500
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return False
+
+def wait_until_ready(service):
+    """Poll the health URL with exponential backoff. Returns seconds to ready, or None."""
+    interval = POLL_INITIAL_INTERVAL
+    deadline = service.started_at + service.ready_timeout
+    while time.monotonic() < deadline:
+        if service.process.poll() is not None:
+            return None  # Exited before becoming healthy
+        if is_healthy(service.health_url):
+            return time.monotonic() - service.started_at
+        time.sleep(interval)
+        interval = min(interval * 2, POLL_MAX_INTERVAL)
+    return None
+
+def launch(service, services_by_name):
+    """Wait for dependencies, start the service and wait for it to become healthy."""
+    for dep_name in service.depends_on:
+        dep = services_by_name[dep_name]
+        while not dep.ready.wait(timeout=0.2):
+            if dep.failed.is_set():
+                print_colored(f"❌ {service.name} not started: {dep_name} failed", Colors.RED)
+                service.failed.set()
+                return
+
+    start_service(service)
+    elapsed = wait_until_ready(service)
+    if elapsed is None:
+        print_colored(f"❌ {service.name} did not become ready (see {service.log_path})", Colors.RED)
+        service.failed.set()
+        return
+    service.time_to_ready = elapsed
+    service.ready.set()
+    print_colored(f"  ✓ {service.name} ready in {elapsed:.1f}s", Colors.GREEN)
+
+def start_all(services):
+    """Start every service, each as soon as its dependencies are ready."""
+    services_by_name = {s.name: s for s in services}
+    threads = [threading.Thread(target=launch, args=(s, services_by_name), daemon=True)
+               for s in services]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.monotonic() - started
+
+def print_summary(services, total):
+    print_colored("\nTime to ready:", Colors.YELLOW)
+    for s in services:
+        if s.ready.is_set():
+            print_colored(f"  • {s.name:<10} {s.time_to_ready:6.1f}s  (PID {s.process.pid})", Colors.BLUE)
+        else:
+            print_colored(f"  • {s.name:<10}  FAILED", Colors.RED)
+    print_colored(f"  • {'Total':<10} {total:6.1f}s", Colors.BLUE)
+
+def restart_delay(service):
+    return min(RESTART_BASE_DELAY * 2 ** service.consecutive_restarts, RESTART_MAX_DELAY)
+
+def await_recovery(service):
+    """Report when a restarted service is healthy again."""
+    elapsed = wait_until_ready(service)
+    if elapsed is not None:
+        service.ready.set()
+        print_colored(f"  ✓ {service.name} ready again in {elapsed:.1f}s", Colors.GREEN)
+
+def supervise(services):
+    """Watch children and restart crashed ones with bounded exponential backoff."""
+    while True:
+        now = time.monotonic()
+        for s in services:
+            # Only supervise services that came up at least once and were not given up on
+            if s.time_to_ready is None or s.failed.is_set():
+                continue
+            if s.process.poll() is None:
+                if s.consecutive_restarts and now - s.started_at > RESTART_RESET_AFTER:
+                    s.consecutive_restarts = 0
+                continue
+
+            if s.next_restart_at is None:
+                # Reap leftovers (e.g. vite under npm) still holding the port
+                signal_service(s.process, getattr(signal, "SIGKILL", signal.SIGTERM))
+                if s.consecutive_restarts >= MAX_RESTARTS:
+                    print_colored(f"❌ {s.name} keeps crashing; giving up after {MAX_RESTARTS} restarts "
+                                  f"(see {s.log_path})", Colors.RED)
+                    s.failed.set()
+                    continue
+                delay = restart_delay(s)
+                s.next_restart_at = now + delay
+                s.ready.clear()
+                print_colored(f"⚠️  {s.name} exited with code {s.process.returncode}; "
+                              f"restarting in {delay:g}s", Colors.YELLOW)
+            elif now >= s.next_restart_at:
+                s.next_restart_at = None
+                s.restarts += 1
+                s.consecutive_restarts += 1
+                start_service(s, append_log=True)
+                threading.Thread(target=await_recovery, args=(s,), daemon=True).start()
+        time.sleep(SUPERVISE_INTERVAL)
+
+def stop_all(services):
+    print_colored("\n🛑 Stopping all services...", Colors.YELLOW)
+    for s in reversed(services):
+        proc = s.process
+        if proc is None or proc.poll() is not None:
+            continue
+        try:
+            signal_service(proc, signal.SIGTERM)
+            proc.wait(timeout=5)
+            print_colored(f"  ✓ {s.name} stopped", Colors.GREEN)
+        except subprocess.TimeoutExpired:
+            signal_service(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+            print_colored(f"  ✗ {s.name} force stopped", Colors.RED)
+
 def main():
     print_colored("🚀 Starting OneCard Bot Services...\n", Colors.GREEN)
-    
+
     # Check dependencies
     check_dependencies()
-    
+
     # Create logs directory
     Path("logs").mkdir(exist_ok=True)
-    
-    processes = []
-    
+
     try:
-        # Start Mock API (Port 5000)
-        mock_api = start_service("Mock API Server", "python3 mock_apis.py", delay=2)
-        processes.append(("Mock API", mock_api))
-        
-        # Start Backend (Port 8000)
-        backend = start_service("AI Backend Server", "python3 backend.py", delay=3)
-        processes.append(("Backend", backend))
-        
-        # Start Frontend (Port 5173)
-        frontend = start_service("Frontend Dev Server", "npm run dev", cwd="onecard-bot", delay=2)
-        processes.append(("Frontend", frontend))
-        
-        print_colored("\n✅ All services started!\n", Colors.GREEN)
-        print_colored("Services running:", Colors.YELLOW)
-        for name, proc in processes:
-            print_colored(f"  • {name}: PID {proc.pid}", Colors.BLUE)
-        print_colored("\n📝 Logs are in the 'logs/' directory", Colors.YELLOW)
-        print_colored("🌐 Frontend: http://localhost:5173", Colors.BLUE)
-        print_colored("🔌 Backend:  http://localhost:8000", Colors.BLUE)
-        print_colored("📡 Mock API: http://localhost:5000", Colors.BLUE)
+        total = start_all(SERVICES)
+        print_summary(SERVICES, total)
+
+        if all(s.ready.is_set() for s in SERVICES):
+            print_colored("\n✅ All services ready!\n", Colors.GREEN)
+        else:
+            print_colored("\n⚠️  Some services failed to start; check the 'logs/' directory\n", Colors.YELLOW)
+        print_colored("📝 Logs are in the 'logs/' directory", Colors.YELLOW)
+        for s in reversed(SERVICES):
+            print_colored(f"🌐 {s.name + ':':<10} {s.url}", Colors.BLUE)
         print_colored("\nPress Ctrl+C to stop all services\n", Colors.YELLOW)
-        
-        # Wait for all processes
-        for name, proc in processes:
-            proc.wait()
-            
+
+        supervise(SERVICES)
+
     except KeyboardInterrupt:
-        print_colored("\n🛑 Stopping all services...", Colors.YELLOW)
-        for name, proc in processes:
-            try:
-                proc.terminate()
-                proc.wait(timeout=5)
-                print_colored(f"  ✓ {name} stopped", Colors.GREEN)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-                print_colored(f"  ✗ {name} force stopped", Colors.RED)
+        stop_all(SERVICES)
         print_colored("\n👋 Goodbye!", Colors.GREEN)
 
 if __name__ == "__main__":
     main()
-
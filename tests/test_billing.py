@@ -0,0 +1,148 @@
+"""Statement arithmetic and cycle ordering in billing.py, on a throwaway SQLite file."""
+
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from billing import add_months, cycle_bounds, cycle_of, run_billing_cycle  # noqa: E402
+from setup_database import Base, Customer, EmiPlan, Statement, Transaction  # noqa: E402
+
+# Three closed cycles, oldest first
+CYCLE_1, CYCLE_2, CYCLE_3 = (add_months(cycle_of(date.today()), n) for n in (-3, -2, -1))
+
+
+def quiet(*args):
+    pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'billing.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_customer(db, balance_due=0.0):
+    customer = Customer(id="cust_test", name="Test", phone="+91 9000000000", balance_due=balance_due)
+    db.add(customer)
+    db.commit()
+    return customer
+
+
+def add_txn(db, txn_id, cycle, day, amount, category="Food"):
+    start, _ = cycle_bounds(cycle)
+    db.add(Transaction(id=txn_id, customer_id="cust_test", merchant="Test", amount=amount,
+                       category=category, date=datetime(start.year, start.month, day, 12)))
+    db.commit()
+
+
+def statement(db, cycle):
+    return db.get(Statement, ("cust_test", cycle))
+
+
+def test_first_cycle_opens_from_balance_due(db):
+    # The API already took the 200 payment off balance_due, so the opening backs it out
+    add_customer(db, balance_due=800.0)
+    add_txn(db, "pay_1", CYCLE_1, 5, 200.0, category="Payment")
+
+    run_billing_cycle(db, CYCLE_1, report=quiet)
+
+    st = statement(db, CYCLE_1)
+    assert st.opening_balance == 1000.0
+    assert st.payments == 200.0
+    assert st.interest == 28.0  # 3.5% of the 800 carried
+    assert st.late_fee == 0.0
+    assert st.total_outstanding == 828.0
+    assert st.min_due == 200.0
+    assert db.get(Customer, "cust_test").balance_due == 828.0
+
+
+def test_late_fee_when_previous_min_due_unpaid(db):
+    add_customer(db, balance_due=1000.0)
+    run_billing_cycle(db, CYCLE_1, report=quiet)
+    run_billing_cycle(db, CYCLE_2, report=quiet)
+
+    st = statement(db, CYCLE_2)
+    assert st.opening_balance == 1035.0
+    assert st.interest == 36.23
+    assert st.late_fee == 500.0
+    assert st.total_outstanding == 1571.23
+
+
+def test_live_balance_keeps_activity_after_the_cycle(db):
+    # 1000 owed before the cycle, paid off after it: the API left balance_due at 0
+    add_customer(db, balance_due=0.0)
+    add_txn(db, "txn_1", CYCLE_1, 10, 3000.0)
+    add_txn(db, "txn_2", CYCLE_2, 3, 400.0)
+    add_txn(db, "pay_1", CYCLE_2, 4, 1000.0, category="Payment")
+
+    run_billing_cycle(db, CYCLE_1, report=quiet)
+
+    st = statement(db, CYCLE_1)
+    assert st.opening_balance == 1000.0
+    assert st.total_outstanding == 4035.0  # Statement stays as of the cycle end
+    assert db.get(Customer, "cust_test").balance_due == 3435.0
+
+
+def test_emi_credit_for_purchase_converted_after_billing(db):
+    add_customer(db, balance_due=0.0)
+    add_txn(db, "txn_big", CYCLE_1, 10, 6000.0, category="Travel")
+    run_billing_cycle(db, CYCLE_1, report=quiet)
+    # Converted once CYCLE_1 was billed: installments start in CYCLE_2, which credits the principal
+    db.add(EmiPlan(txn_id="txn_big", customer_id="cust_test", principal=6000.0, tenure_months=6,
+                   monthly_installment=1075.0, first_cycle=CYCLE_2,
+                   last_cycle=add_months(CYCLE_2, 5), credit_cycle=CYCLE_2))
+    add_txn(db, "pay_1", CYCLE_2, 3, 300.0, category="Payment")
+
+    run_billing_cycle(db, CYCLE_2, report=quiet)
+
+    st = statement(db, CYCLE_2)
+    assert st.opening_balance == 6000.0
+    assert st.emi_credits == 6000.0
+    assert st.emi_installments == 1075.0
+    assert st.interest == 0.0
+    assert st.late_fee == 0.0  # The 300 minimum due was paid on time
+    assert st.total_outstanding == 775.0
+
+
+def test_older_cycle_is_rejected_and_balances_untouched(db):
+    add_customer(db, balance_due=1000.0)
+    run_billing_cycle(db, CYCLE_2, report=quiet)
+    balance = db.get(Customer, "cust_test").balance_due
+
+    with pytest.raises(ValueError, match="older than the latest billed cycle"):
+        run_billing_cycle(db, CYCLE_1, report=quiet)
+    with pytest.raises(ValueError, match="older than the latest billed cycle"):
+        run_billing_cycle(db, CYCLE_1, force=True, report=quiet)
+
+    db.expire_all()
+    assert db.get(Customer, "cust_test").balance_due == balance
+    assert statement(db, CYCLE_1) is None
+
+
+def test_force_reruns_latest_cycle_with_same_result(db):
+    add_customer(db, balance_due=1000.0)
+    add_txn(db, "txn_1", CYCLE_3, 10, 250.0)
+    run_billing_cycle(db, CYCLE_3, report=quiet)
+    first = statement(db, CYCLE_3).total_outstanding
+
+    assert run_billing_cycle(db, CYCLE_3, report=quiet) == 0
+    run_billing_cycle(db, CYCLE_3, force=True, report=quiet)
+
+    db.expire_all()
+    assert statement(db, CYCLE_3).total_outstanding == first
+
+
+def test_cycle_that_has_not_ended_is_rejected(db):
+    add_customer(db)
+    with pytest.raises(ValueError, match="has not ended yet"):
+        run_billing_cycle(db, cycle_of(date.today()), report=quiet)